@@ -6,7 +6,9 @@ import streamlit as st
 from dotenv import load_dotenv
 
 from rag_utils import (
+    TfidfStore,
     build_store_from_pdf,
+    pdf_hash,
     answer_question,
     summarize_lecture,
     generate_quiz,
@@ -38,6 +40,58 @@ def configure_gemini() -> None:
         st.stop()
 
 
+# ------------ Cached computations ------------
+# Streamlit reruns the whole script on every widget change; these keep
+# the expensive parts keyed on the PDF hash + their parameters.
+# (Summaries are memoised on the store itself, see summarize_lecture; quizzes
+# are just a slice of the store's precomputed keywords, so are not cached.)
+
+# stores are identified by the hash of the PDF they were built from
+# (or a per-store token when that is unknown)
+_STORE_HASH_FUNCS = {TfidfStore: lambda s: s.cache_key}
+
+# built stores are shared by all sessions; keep only the most recent few
+# (a session that is still using an evicted store keeps its own reference)
+STORE_CACHE_ENTRIES = 8
+STORE_CACHE_TTL = "2h"
+
+
+@st.cache_resource(show_spinner=False, max_entries=STORE_CACHE_ENTRIES, ttl=STORE_CACHE_TTL)
+def load_store(pdf_id: str, _pdf_bytes: bytes) -> TfidfStore:
+    with tempfile.NamedTemporaryFile(delete=False, suffix=".pdf") as tmp:
+        tmp.write(_pdf_bytes)
+        temp_path = tmp.name
+    try:
+        return build_store_from_pdf(temp_path, pdf_id=pdf_id)
+    finally:
+        os.remove(temp_path)
+
+
+# shared by all sessions too, so bounded the same way as the stores
+@st.cache_data(
+    show_spinner=False,
+    hash_funcs=_STORE_HASH_FUNCS,
+    max_entries=STORE_CACHE_ENTRIES,
+    ttl=STORE_CACHE_TTL,
+)
+def cached_study_plan(
+    store: TfidfStore,
+    exam_date: str,
+    hours_per_day: int,
+    level: str,
+    weak_topics: str,
+    today: str,
+) -> str:
+    # `today` is only part of the cache key: the plan counts days from today
+    return generate_study_plan(
+        store=store,
+        exam_date=exam_date,
+        hours_per_day=hours_per_day,
+        level=level,
+        weak_topics=weak_topics,
+    )
+
+
 # ------------ Sidebar ------------
 
 with st.sidebar:
@@ -76,11 +130,8 @@ if process_btn:
         st.warning("Please upload a PDF first.")
     else:
         with st.spinner("Processing PDF and building knowledge base..."):
-            with tempfile.NamedTemporaryFile(delete=False, suffix=".pdf") as tmp:
-                tmp.write(uploaded_file.read())
-                temp_path = tmp.name
-
-            store = build_store_from_pdf(temp_path)
+            data = uploaded_file.getvalue()
+            store = load_store(pdf_hash(data), data)
             st.session_state["vector_store"] = store
         st.success("Slides processed successfully! You can now use the tools below. ✅")
 
@@ -149,12 +200,13 @@ with tab_plan:
 
     if st.button("Generate study plan", key="plan_btn"):
         with st.spinner("Designing your plan..."):
-            plan = generate_study_plan(
-                store=store,
-                exam_date=str(exam_date),
-                hours_per_day=hours_per_day,
-                level=level,
-                weak_topics=weak_topics,
+            plan = cached_study_plan(
+                store,
+                str(exam_date),
+                hours_per_day,
+                level,
+                weak_topics,
+                today=str(date.today()),
             )
         st.markdown("### Study Plan")
         st.write(plan)
@@ -1,12 +1,28 @@
-from typing import List, Tuple
+from typing import Dict, List, Optional, Tuple
+import hashlib
+import json
+import os
 import re
-from collections import Counter
+import shutil
+import tempfile
+import threading
+import time
+import uuid
+import zlib
+from collections import Counter, OrderedDict
 from datetime import datetime, timedelta, date
+from functools import cached_property
 
 import numpy as np
+import scipy.sparse as sp
 from pypdf import PdfReader
-from sklearn.feature_extraction.text import TfidfVectorizer
-from sklearn.metrics.pairwise import cosine_similarity
+from sklearn.feature_extraction.text import HashingVectorizer
+from sklearn.preprocessing import normalize
+
+try:  # PyMuPDF is much faster than pypdf, but optional
+    import fitz
+except ImportError:
+    fitz = None
 
 
 # ----------------- Dummy Gemini setup (UI still calls this) ----------------- #
@@ -22,8 +38,18 @@ def set_gemini_api_key(api_key: str):
 # ----------------- PDF → TEXT → CHUNKS ----------------- #
 
 def extract_text_from_pdf(path: str) -> str:
-    reader = PdfReader(path)
     pages = []
+    if fitz is not None:
+        with fitz.open(path) as doc:
+            for page in doc:
+                try:
+                    txt = page.get_text("text") or ""
+                except Exception:
+                    txt = ""
+                pages.append(txt)
+        return "\n\n".join(pages)
+
+    reader = PdfReader(path)
     for page in reader.pages:
         try:
             txt = page.extract_text() or ""
@@ -33,79 +59,481 @@ def extract_text_from_pdf(path: str) -> str:
     return "\n\n".join(pages)
 
 
+def _split_offsets(n_words: int, chunk_size: int, overlap: int) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Word-index windows [start, end) for chunking n_words words.
+    The last window is the first one that reaches n_words.
+    """
+    step = chunk_size - overlap
+    n_windows = 1 if n_words <= chunk_size else -(-(n_words - chunk_size) // step) + 1
+    starts = np.arange(n_windows, dtype=np.int64) * step
+    ends = np.minimum(starts + chunk_size, n_words)
+    return starts, ends
+
+
 def split_into_chunks(text: str, chunk_size: int = 800, overlap: int = 200) -> List[str]:
     """
     Simple word-based chunking with overlap.
     """
+    if not 0 <= overlap < chunk_size:
+        # otherwise the window never advances
+        raise ValueError("overlap must be >= 0 and smaller than chunk_size")
+
     words = text.split()
     if not words:
         return []
 
-    chunks: List[str] = []
-    start = 0
-    n = len(words)
+    starts, ends = _split_offsets(len(words), chunk_size, overlap)
+    return [" ".join(words[s:e]) for s, e in zip(starts.tolist(), ends.tolist())]
+
+
+# ----------------- NEAR-DUPLICATE CHUNKS (MinHash + LSH) ----------------- #
+
+# Slide decks often repeat whole slides (agenda, recap, incremental builds);
+# chunks whose word 5-grams overlap this much are dropped before fitting.
+DEDUP_THRESHOLD = 0.85
+_SHINGLE = 5
+_LSH_BANDS, _LSH_ROWS = 16, 4          # 64 permutations
+_MASK32 = np.uint64(0xFFFFFFFF)
+_rng = np.random.default_rng(0)
+# multiply-shift hash family: (a * x + b) >> 32, with odd a
+_PERM_A = _rng.integers(1, 2 ** 63, _LSH_BANDS * _LSH_ROWS, dtype=np.uint64) | np.uint64(1)
+_PERM_B = _rng.integers(0, 2 ** 63, _LSH_BANDS * _LSH_ROWS, dtype=np.uint64)
+del _rng
 
-    while start < n:
-        end = min(start + chunk_size, n)
-        chunk = " ".join(words[start:end])
-        chunks.append(chunk)
-        if end == n:
-            break
-        start = max(0, end - overlap)
 
-    return chunks
+def _minhash(chunk: str) -> np.ndarray:
+    words = chunk.split()
+    h = np.fromiter((zlib.crc32(w.encode("utf-8")) for w in words), dtype=np.uint64, count=len(words))
+    # rolling hash of each word k-gram (whole chunk if it is shorter)
+    k = min(_SHINGLE, len(h))
+    shingles = h[: len(h) - k + 1].copy()
+    for j in range(1, k):
+        shingles = (shingles * np.uint64(1000003) + h[j: len(h) - k + 1 + j]) & _MASK32
+    with np.errstate(over="ignore"):
+        perms = (shingles[:, None] * _PERM_A + _PERM_B) >> np.uint64(32)
+    return perms.min(axis=0)
+
+
+def _dedupe_chunks(chunks: List[str], threshold: float = DEDUP_THRESHOLD) -> List[str]:
+    """
+    Keep the first chunk of every group of near-duplicates (estimated Jaccard >= threshold).
+    LSH banding only compares chunks that share at least one band of their signature.
+    """
+    buckets = {}
+    kept: List[str] = []
+    kept_sigs: List[np.ndarray] = []
+    for chunk in chunks:
+        if not chunk:
+            continue
+        sig = _minhash(chunk)
+        bands = [(b, sig[b * _LSH_ROWS:(b + 1) * _LSH_ROWS].tobytes()) for b in range(_LSH_BANDS)]
+        candidates = {i for band in bands for i in buckets.get(band, ())}
+        if any(np.mean(kept_sigs[i] == sig) >= threshold for i in candidates):
+            continue
+        for band in bands:
+            buckets.setdefault(band, []).append(len(kept))
+        kept.append(chunk)
+        kept_sigs.append(sig)
+    return kept
 
 
 # ----------------- TF-IDF STORE ----------------- #
 
+def _topk_sparse_cosine(
+    matrix_csc, q_vec, k: int, out: Optional[np.ndarray] = None
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Top-k dot products of a (1, n_features) sparse query against the rows of a CSC matrix.
+    Only the columns of the query's terms are visited, so chunks sharing no term
+    with the question are never touched (the sparse version of early abort).
+    `out` (float32, one slot per row) is reused as the score buffer if given.
+    """
+    if out is None:
+        sims = np.zeros(matrix_csc.shape[0], dtype=np.float32)
+    else:
+        sims = out
+        sims.fill(0.0)
+    indptr, indices, data = matrix_csc.indptr, matrix_csc.indices, matrix_csc.data
+    for col, weight in zip(q_vec.indices, q_vec.data):
+        lo, hi = indptr[col], indptr[col + 1]
+        # row indices are unique within a column, so fancy-index += is safe
+        sims[indices[lo:hi]] += weight * data[lo:hi]
+
+    if k < len(sims):
+        idxs = np.argpartition(-sims, k)[:k]
+        idxs = idxs[np.argsort(-sims[idxs])]
+    else:
+        idxs = np.argsort(-sims)
+    return idxs, sims[idxs]
+
+
+# Answers for repeated / near-duplicate questions are served from a small
+# per-store cache instead of re-running retrieval.
+ANSWER_CACHE_SIZE = 64
+ANSWER_CACHE_THRESHOLD = 0.95
+
+# width of the hashed term space (collisions are negligible at lecture scale)
+HASH_FEATURES = 2 ** 18
+
+
+def _make_hasher() -> HashingVectorizer:
+    # raw hashed term counts; IDF and L2 norm are applied by TfidfStore
+    return HashingVectorizer(
+        stop_words="english",
+        n_features=HASH_FEATURES,
+        alternate_sign=False,
+        norm=None,
+        dtype=np.float32,
+    )
+
+
+def _vector_terms(q_vec) -> List[Tuple[int, float]]:
+    """
+    (column, weight) pairs of a single-row sparse vector.
+    """
+    q_vec = q_vec.tocsr()
+    return list(zip(q_vec.indices.tolist(), q_vec.data.tolist()))
+
+
 class TfidfStore:
     def __init__(self, chunks: List[str]):
         self.chunks = chunks
-        self.vectorizer = TfidfVectorizer(stop_words="english")
-        self.matrix = self.vectorizer.fit_transform(chunks)
+        # content hash of the source PDF, set by build_store_from_pdf when known
+        self.pdf_hash: Optional[str] = None
+        self._uid = uuid.uuid4().hex
+        # Hashed term counts (no vocabulary dict) + smoothed IDF + L2 norm, i.e. what
+        # TfidfVectorizer computes up to rare hash collisions.
+        # float32 halves the bytes streamed per search; precision is irrelevant here
+        self.vectorizer = _make_hasher()
+        counts = self.vectorizer.transform(chunks).tocsr()
+        n = counts.shape[0]
+        # document frequency straight from the CSR column indices (no CSC copy)
+        df = np.bincount(counts.indices, minlength=counts.shape[1])
+        self.idf = (np.log((1 + n) / (1 + df)) + 1).astype(np.float32)
+        # rows are L2-normalised by _weight, so cosine == dot product
+        self.matrix = self._weight(counts)
+        # column-major copy for search: a query only touches its own terms' columns
+        self._matrix_csc = self.matrix.tocsc()
+        self._init_search_state()
+        self._init_answer_cache()
+        # summary length budget -> rendered summary
+        self._summary_cache = {}
+
+    @classmethod
+    def from_cached(cls, chunks: List[str], matrix, idf: np.ndarray, raw_text: str) -> "TfidfStore":
+        """
+        Rebuild a store from already fitted parts (skips fitting).
+        """
+        store = cls.__new__(cls)
+        store.chunks = chunks
+        store.pdf_hash = None
+        store._uid = uuid.uuid4().hex
+        store.vectorizer = _make_hasher()
+        store.idf = idf.astype(np.float32, copy=False)
+        store.matrix = matrix.astype(np.float32, copy=False).tocsr()
+        store._matrix_csc = store.matrix.tocsc()
+        store._init_search_state()
+        store.raw_text = raw_text
+        store._init_answer_cache()
+        store._summary_cache = {}
+        return store
+
+    @property
+    def cache_key(self) -> str:
+        """
+        Identifies the store in caches: the PDF hash if known, else a per-store token.
+        """
+        return self.pdf_hash or self._uid
+
+    # Per-chunk snippets, built on first use (or restored from the disk cache):
+    # answer_question quotes the medium ones, generate_study_plan slices ready-made
+    # markdown bullets (chunks are never blank, so neither are these).
+
+    @cached_property
+    def chunk_snippets_med(self) -> List[str]:
+        return [_first_sentences(c, max_chars=400) for c in self.chunks]
+
+    @cached_property
+    def chunk_plan_lines(self) -> List[str]:
+        return [f"- {_first_sentences(c, max_chars=120)}" for c in self.chunks]
+
+    def _init_search_state(self) -> None:
+        # one score slot per chunk, reused by every search (guarded: stores are shared)
+        self._sims_buf = np.empty(self.matrix.shape[0], dtype=np.float32)
+        self._search_lock = threading.Lock()
+
+    def _init_answer_cache(self) -> None:
+        # query hash -> (query vector terms, answer), oldest first
+        self._q_cache: "OrderedDict[bytes, Tuple[List[Tuple[int, float]], str]]" = OrderedDict()
+        # inverted index over the cached query vectors: term column -> {query hash: weight},
+        # updated on insert / evict so a probe only touches the new query's terms
+        self._q_index: Dict[int, Dict[bytes, float]] = {}
+        # the app shares one store across sessions (st.cache_resource)
+        self._q_lock = threading.Lock()
+
+    def _weight(self, counts) -> sp.csr_matrix:
+        """
+        IDF-weight and L2-normalise hashed counts in place
+        (TfidfTransformer would build a diagonal matrix and copy).
+        """
+        counts.data *= self.idf[counts.indices]
+        return normalize(counts, norm="l2", copy=False)
+
+    def transform(self, texts: List[str]) -> sp.csr_matrix:
+        return self._weight(self.vectorizer.transform(texts).tocsr())
+
+    def top_k(self, q_vec, k: int = 5) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Indices of the k best chunks for a query vector, best first, and their scores.
+        """
+        q_vec = q_vec.astype(np.float32, copy=False).tocsr()
+        with self._search_lock:
+            # scores come back as a copy (fancy indexing), so the buffer can be reused
+            return _topk_sparse_cosine(self._matrix_csc, q_vec, k, out=self._sims_buf)
+
+    def similarity_search(self, query: str, k: int = 5, q_vec=None) -> List[Tuple[str, float]]:
+        if q_vec is None:
+            q_vec = self.transform([query])
+        idxs, scores = self.top_k(q_vec, k)
+        return [(self.chunks[i], float(s)) for i, s in zip(idxs, scores)]
+
+    # ----- summary cache ----- #
+
+    def cached_summary(self, max_chars: int) -> Optional[str]:
+        return self._summary_cache.get(max_chars)
+
+    def remember_summary(self, max_chars: int, summary: str) -> None:
+        self._summary_cache[max_chars] = summary
+
+    # ----- answer cache ----- #
+
+    @staticmethod
+    def _query_key(query: str) -> bytes:
+        return hashlib.blake2b(query.encode("utf-8")).digest()
+
+    def cached_answer(self, query: str, q_vec=None) -> Optional[str]:
+        """
+        Exact hit on the query text first, then a near hit on the query vector.
+        A near hit is also stored under the new query, so repeating it is an exact hit.
+        """
+        key = self._query_key(query)
+        with self._q_lock:
+            hit = self._q_cache.get(key)
+            if hit is not None:
+                self._q_cache.move_to_end(key)
+                return hit[1]
+
+            if q_vec is None or q_vec.nnz == 0 or not self._q_cache:
+                return None
+
+            terms = _vector_terms(q_vec)
+            sims: Dict[bytes, float] = {}
+            for col, weight in terms:
+                for other, other_weight in self._q_index.get(col, {}).items():
+                    sims[other] = sims.get(other, 0.0) + weight * other_weight
+            if not sims:
+                return None
+            best = max(sims, key=sims.get)
+            if sims[best] < ANSWER_CACHE_THRESHOLD:
+                return None
+            answer = self._q_cache[best][1]
+            self._q_cache.move_to_end(best)
+            self._insert_answer(key, terms, answer)
+            return answer
+
+    def remember_answer(self, query: str, q_vec, answer: str) -> None:
+        key = self._query_key(query)
+        with self._q_lock:
+            self._insert_answer(key, _vector_terms(q_vec), answer)
+
+    def _insert_answer(self, key: bytes, terms: List[Tuple[int, float]], answer: str) -> None:
+        # caller holds _q_lock
+        if key in self._q_cache:
+            self._drop_answer(key)
+        self._q_cache[key] = (terms, answer)
+        for col, weight in terms:
+            self._q_index.setdefault(col, {})[key] = weight
+        while len(self._q_cache) > ANSWER_CACHE_SIZE:
+            self._drop_answer(next(iter(self._q_cache)))
+
+    def _drop_answer(self, key: bytes) -> None:
+        terms, _ = self._q_cache.pop(key)
+        for col, _ in terms:
+            postings = self._q_index[col]
+            del postings[key]
+            if not postings:
+                del self._q_index[col]
+
+
+# ----------------- STORE CACHE (per PDF content hash) ----------------- #
+
+CACHE_DIR = os.path.join(os.path.expanduser("~"), ".cache", "smart_assistant")
+# bump when the on-disk layout or what goes into a store changes
+CACHE_VERSION = 5
+# entries hold users' lecture text, so keep only a few recently used ones
+CACHE_MAX_ENTRIES = 16
+CACHE_MAX_AGE = 7 * 24 * 3600  # seconds since last use
+
+# computed in build_store_from_pdf and cached alongside the fitted matrix
+_DERIVED_FIELDS = ("keywords", "chunk_plan_lines", "chunk_snippets_med")
+
+
+def _cache_path(pdf_id: str) -> str:
+    """
+    One directory per PDF: matrix.npz, idf.npy, meta.json.
+    """
+    return os.path.join(CACHE_DIR, pdf_id)
+
+
+def pdf_hash(data: bytes) -> str:
+    return hashlib.blake2b(data).hexdigest()
+
+
+def _mtime(path: str) -> float:
+    try:
+        return os.stat(path).st_mtime
+    except OSError:
+        return 0.0
+
 
-    def similarity_search(self, query: str, k: int = 5) -> List[Tuple[str, float]]:
-        q_vec = self.vectorizer.transform([query])
-        sims = cosine_similarity(q_vec, self.matrix)[0]
-        idxs = np.argsort(-sims)[:k]
-        return [(self.chunks[i], float(sims[i])) for i in idxs]
+def _evict_cached_stores() -> None:
+    """
+    Remove entries unused for CACHE_MAX_AGE, then the least recently used
+    ones beyond CACHE_MAX_ENTRIES. Temp dirs (dot-prefixed) are left alone.
+    """
+    try:
+        names = [n for n in os.listdir(CACHE_DIR) if not n.startswith(".")]
+    except OSError:
+        return
+    paths = sorted((os.path.join(CACHE_DIR, n) for n in names), key=_mtime, reverse=True)
+    cutoff = time.time() - CACHE_MAX_AGE
+    for i, path in enumerate(paths):
+        if i >= CACHE_MAX_ENTRIES or _mtime(path) < cutoff:
+            shutil.rmtree(path, ignore_errors=True)
+
+
+def load_cached_store(pdf_id: str) -> Optional[TfidfStore]:
+    path = _cache_path(pdf_id)
+    if _mtime(path) < time.time() - CACHE_MAX_AGE:
+        shutil.rmtree(path, ignore_errors=True)
+        return None
+    try:
+        with open(os.path.join(path, "meta.json"), encoding="utf-8") as f:
+            meta = json.load(f)
+        if meta.get("version") != CACHE_VERSION:
+            return None
+        matrix = sp.load_npz(os.path.join(path, "matrix.npz"))
+        idf = np.load(os.path.join(path, "idf.npy"))
+        store = TfidfStore.from_cached(meta["chunks"], matrix, idf, meta["raw_text"])
+        for name in _DERIVED_FIELDS:
+            setattr(store, name, meta[name])
+    except Exception:
+        return None
+    try:
+        os.utime(path)  # mark as recently used for eviction
+    except OSError:
+        pass
+    store.pdf_hash = pdf_id
+    return store
 
 
-def build_store_from_pdf(path: str) -> TfidfStore:
+def save_cached_store(pdf_id: str, store: TfidfStore) -> None:
+    """
+    Best effort: the cache is an optimisation, so a read-only disk is fine.
+    Files are written to a temp dir first so readers never see a partial entry.
+    """
+    meta = {"version": CACHE_VERSION, "chunks": store.chunks, "raw_text": store.raw_text}
+    meta.update((name, getattr(store, name)) for name in _DERIVED_FIELDS)
+    try:
+        os.makedirs(CACHE_DIR, exist_ok=True)
+        tmp_dir = tempfile.mkdtemp(dir=CACHE_DIR, prefix=f".{pdf_id}.")
+        try:
+            sp.save_npz(os.path.join(tmp_dir, "matrix.npz"), store.matrix, compressed=False)
+            np.save(os.path.join(tmp_dir, "idf.npy"), store.idf)
+            with open(os.path.join(tmp_dir, "meta.json"), "w", encoding="utf-8") as f:
+                json.dump(meta, f)
+            path = _cache_path(pdf_id)
+            shutil.rmtree(path, ignore_errors=True)  # stale version
+            os.replace(tmp_dir, path)
+        finally:
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+    except OSError:
+        pass
+    _evict_cached_stores()
+
+
+def build_store_from_pdf(path: str, pdf_id: Optional[str] = None) -> TfidfStore:
+    """
+    If pdf_id (see pdf_hash) is given, reuse / fill the on-disk cache.
+    """
+    if pdf_id:
+        store = load_cached_store(pdf_id)
+        if store is not None:
+            return store
+
     text = extract_text_from_pdf(path)
-    chunks = split_into_chunks(text)
+    chunks = _dedupe_chunks(split_into_chunks(text))
     if not chunks:
         raise ValueError("No text could be extracted from the PDF.")
     store = TfidfStore(chunks)
     store.raw_text = text
+    # ranked once here; generate_quiz just slices this list
+    store.keywords = _extract_keywords(text, max_words=MAX_KEYWORDS)
+    store.pdf_hash = pdf_id
+
+    if pdf_id:
+        save_cached_store(pdf_id, store)
     return store
 
 
 # ----------------- Helper: simple keyword extractor ----------------- #
 
+MAX_KEYWORDS = 200
+
+_SENT_RE = re.compile(r"(?<=[.!?])\s+")
+_LEAD_WS_RE = re.compile(r"\s*")
+_WORD_RE = re.compile(r"[A-Za-z]{4,}")
+
+# skip super common boring words
+_STOP = frozenset({"this", "that", "these", "those", "have", "been", "which",
+                   "there", "where", "from", "with", "about", "other", "because"})
+
+
 def _extract_keywords(text: str, max_words: int = 40) -> List[str]:
-    tokens = re.findall(r"[A-Za-z]{4,}", text.lower())
+    tokens = _WORD_RE.findall(text.lower())
     if not tokens:
         return []
     counts = Counter(tokens)
-    # skip super common boring words
-    stop = {"this", "that", "these", "those", "have", "been", "which",
-            "there", "where", "from", "with", "about", "other", "because"}
-    keywords = [w for w, _ in counts.most_common() if w not in stop]
-    return keywords[:max_words]
+    # bounded heap: at most len(_STOP) of the top entries can be filtered out
+    keywords: List[str] = []
+    for w, _ in counts.most_common(max_words + len(_STOP)):
+        if len(keywords) >= max_words:
+            break
+        if w not in _STOP:
+            keywords.append(w)
+    return keywords
 
 
 def _first_sentences(text: str, max_chars: int = 1200) -> str:
-    sentences = re.split(r"(?<=[.!?])\s+", text.strip())
+    """
+    Leading sentences of text, up to about max_chars.
+    Boundaries are found lazily, so only the head of a long text is scanned.
+    """
     out = []
     total = 0
-    for s in sentences:
-        if not s:
-            continue
+    pos = _LEAD_WS_RE.match(text).end()
+    for m in _SENT_RE.finditer(text, pos):
+        s = text[pos:m.start()]
+        pos = m.end()
         if total + len(s) > max_chars and out:
-            break
+            return " ".join(out)
         out.append(s)
         total += len(s)
+
+    s = text[pos:].rstrip()
+    if s and not (total + len(s) > max_chars and out):
+        out.append(s)
     return " ".join(out)
 
 
@@ -116,52 +544,72 @@ def answer_question(question: str, store: TfidfStore) -> str:
     Offline mode:
     - retrieve top chunks
     - show them as the answer + small explanation.
+    Answers are cached on the store (kept alive by the app between reruns),
+    so repeated questions skip retrieval entirely.
     """
-    docs = store.similarity_search(question, k=3)
-    if not docs:
+    cached = store.cached_answer(question)
+    if cached is not None:
+        return cached
+
+    q_vec = store.transform([question])
+    cached = store.cached_answer(question, q_vec)
+    if cached is not None:
+        return cached
+
+    idxs, _ = store.top_k(q_vec, k=3)
+    if not len(idxs):
         return "I couldn't find anything in the slides related to your question."
 
     parts = []
-    for i, (chunk, score) in enumerate(docs, start=1):
-        snippet = _first_sentences(chunk, max_chars=400)
-        parts.append(f"{i}. {snippet}")
+    for i, idx in enumerate(idxs, start=1):
+        parts.append(f"{i}. {store.chunk_snippets_med[idx]}")
 
     joined = "\n\n".join(parts)
 
-    return (
+    answer = (
         "🔍 *Offline demo answer*\n\n"
         "Here are the most relevant notes from your slides for this question:\n\n"
         f"{joined}"
     )
+    store.remember_answer(question, q_vec, answer)
+    return answer
 
 
 def summarize_lecture(store: TfidfStore, detail: str = "medium") -> str:
     """
     Offline summary = take important sentences from the raw text.
+    Summaries are memoised per store (one entry per length budget).
     """
-    base = _first_sentences(store.raw_text, max_chars={
+    max_chars = {
         "short": 800,
         "medium": 1500,
         "long": 2500,
-    }.get(detail, 1500))
+    }.get(detail, 1500)
+    cached = store.cached_summary(max_chars)
+    if cached is not None:
+        return cached
+
+    base = _first_sentences(store.raw_text, max_chars=max_chars)
 
-    bullets = re.split(r"(?<=[.!?])\s+", base)
+    bullets = _SENT_RE.split(base)
     bullets = [b.strip() for b in bullets if b.strip()]
 
     lines = [f"- {b}" for b in bullets]
 
-    return (
+    summary = (
         "📝 *Offline summary generated from your slides (no external LLM used).* \n\n"
         + "\n".join(lines)
     )
+    store.remember_summary(max_chars, summary)
+    return summary
 
 
 def generate_quiz(store: TfidfStore, num_questions: int = 8, difficulty: str = "medium") -> str:
     """
     Offline quiz:
-    - use frequent keywords as topics for open questions.
+    - use frequent keywords (ranked once in build_store_from_pdf) as topics for open questions.
     """
-    keywords = _extract_keywords(store.raw_text, max_words=max(num_questions * 2, 10))
+    keywords = store.keywords[:num_questions]
     if not keywords:
         return "Could not generate a quiz because not enough text/keywords were found."
 
@@ -225,14 +673,9 @@ def generate_study_plan(
         end = min(idx + per_day, len(chunks))
         idx = end
 
-        subtopics = []
-        for c in chunks[start:end]:
-            sent = _first_sentences(c, max_chars=120)
-            if sent:
-                subtopics.append(f"- {sent}")
-
+        subtopics = store.chunk_plan_lines[start:end]
         if not subtopics:
-            subtopics.append("- Review previous material or do practice problems.")
+            subtopics = ["- Review previous material or do practice problems."]
 
         lines.append(f"**Day {day_num}:**")
         lines.extend(subtopics)
@@ -0,0 +1,249 @@
+import os
+import random
+import re
+
+import rag_utils
+from rag_utils import (
+    TfidfStore,
+    _dedupe_chunks,
+    _first_sentences,
+    answer_question,
+    generate_study_plan,
+    load_cached_store,
+    save_cached_store,
+    split_into_chunks,
+    summarize_lecture,
+)
+
+
+CHUNKS = [
+    "Virtual memory maps pages to frames. The page table stores the mapping.",
+    "A deadlock needs four conditions. Mutual exclusion is the first one!",
+    "Threads share the address space of their process. Each has its own stack.",
+]
+
+
+# ----------------- TfidfStore ----------------- #
+
+def test_bare_store_answers_and_plans():
+    store = TfidfStore(CHUNKS)
+
+    answer = answer_question("what does the page table store?", store)
+    assert "Virtual memory maps pages to frames." in answer
+
+    plan = generate_study_plan(store, "2000-01-01", 2, "beginner", "")
+    assert "- A deadlock needs four conditions." in plan
+
+
+def test_cache_key_is_unique_without_pdf_hash():
+    a, b = TfidfStore(CHUNKS), TfidfStore(CHUNKS)
+    assert a.cache_key != b.cache_key
+
+    a.pdf_hash = b.pdf_hash = "same-pdf"
+    assert a.cache_key == b.cache_key == "same-pdf"
+
+
+# ----------------- Answer cache ----------------- #
+
+def _cached_keys(store):
+    return set(store._q_cache)
+
+
+def _posted_keys(store):
+    return {key for postings in store._q_index.values() for key in postings}
+
+
+def test_answer_cache_exact_hit():
+    store = TfidfStore(CHUNKS)
+    q = "what does the page table store?"
+    assert store.cached_answer(q) is None
+
+    answer = answer_question(q, store)
+    # exact hits are served before the question is even vectorised
+    assert store.cached_answer(q) == answer
+    assert answer_question(q, store) is answer
+
+
+def test_answer_cache_near_hit_threshold():
+    store = TfidfStore(CHUNKS)
+    store.remember_answer("page table", store.transform(["page table"]), "cached")
+
+    # same terms, different text: cosine 1.0
+    near = "What is THE page table?"
+    assert store.cached_answer(near, store.transform([near])) == "cached"
+    # the near hit is stored under its own key, so it is now an exact hit
+    assert store.cached_answer(near) == "cached"
+
+    far = "page table deadlock"
+    sim = (store.transform([far]) @ store.transform(["page table"]).T).toarray()[0, 0]
+    assert 0 < sim < rag_utils.ANSWER_CACHE_THRESHOLD
+    assert store.cached_answer(far, store.transform([far])) is None
+
+
+def test_answer_cache_evicts_lru_and_its_postings(monkeypatch):
+    monkeypatch.setattr(rag_utils, "ANSWER_CACHE_SIZE", 3)
+    store = TfidfStore(CHUNKS)
+    questions = ["paging frames", "deadlock conditions", "thread stack", "mutual exclusion"]
+    for q in questions[:3]:
+        store.remember_answer(q, store.transform([q]), q.upper())
+    # touch the oldest entry so the second one becomes least recently used
+    assert store.cached_answer(questions[0]) == "PAGING FRAMES"
+
+    store.remember_answer(questions[3], store.transform([questions[3]]), "MUTUAL EXCLUSION")
+    kept = {store._query_key(q) for q in (questions[0], questions[2], questions[3])}
+    assert _cached_keys(store) == kept
+    assert _posted_keys(store) == kept
+    assert all(store._q_index.values())  # no empty posting lists left behind
+
+    evicted = questions[1]
+    assert store.cached_answer(evicted, store.transform([evicted])) is None
+
+
+# ----------------- Reference versions of rewritten helpers ----------------- #
+# The originals these helpers replaced; the fast versions must match them exactly.
+
+def _split_into_chunks_ref(text, chunk_size=800, overlap=200):
+    words = text.split()
+    chunks = []
+    start = 0
+    n = len(words)
+    while start < n:
+        end = min(start + chunk_size, n)
+        chunks.append(" ".join(words[start:end]))
+        if end == n:
+            break
+        start = max(0, end - overlap)
+    return chunks
+
+
+def _first_sentences_ref(text, max_chars=1200):
+    sentences = re.split(r"(?<=[.!?])\s+", text.strip())
+    out = []
+    total = 0
+    for s in sentences:
+        if not s:
+            continue
+        if total + len(s) > max_chars and out:
+            break
+        out.append(s)
+        total += len(s)
+    return " ".join(out)
+
+
+def test_split_into_chunks_matches_reference():
+    for n_words in range(0, 40):
+        text = " ".join(f"w{i}" for i in range(n_words))
+        for chunk_size in range(1, 10):
+            for overlap in range(chunk_size):
+                assert split_into_chunks(text, chunk_size, overlap) == \
+                    _split_into_chunks_ref(text, chunk_size, overlap)
+
+
+def test_first_sentences_matches_reference():
+    rng = random.Random(5)
+    alphabet = "ab .!?\n\t \x1cx"
+    for _ in range(5000):
+        text = "".join(rng.choice(alphabet) for _ in range(rng.randint(0, 40)))
+        for max_chars in (0, 1, 3, 10, 100):
+            assert _first_sentences(text, max_chars) == _first_sentences_ref(text, max_chars)
+
+
+# ----------------- Near-duplicate chunks ----------------- #
+
+def _random_chunk(rng, n_words=800):
+    return " ".join(f"word{rng.randrange(5000)}" for _ in range(n_words))
+
+
+def test_dedupe_drops_exact_and_near_duplicates():
+    rng = random.Random(0)
+    a, b = _random_chunk(rng), _random_chunk(rng)
+    words = a.split()
+    one_word_changed = " ".join(words[:400] + ["changed"] + words[401:])
+    assert _dedupe_chunks([a, b, a, one_word_changed]) == [a, b]
+
+
+def test_dedupe_keeps_distinct_and_overlapping_chunks():
+    rng = random.Random(1)
+    chunks = split_into_chunks(_random_chunk(rng, 5000))
+    # neighbouring chunks share 200 of 800 words, far below the threshold
+    assert _dedupe_chunks(chunks) == chunks
+
+    words = chunks[0].split()
+    partial = " ".join(words[:600] + _random_chunk(rng, 200).split())
+    assert _dedupe_chunks([chunks[0], partial]) == [chunks[0], partial]
+
+
+def test_summary_is_memoised_per_length_budget():
+    store = TfidfStore(CHUNKS)
+    store.raw_text = " ".join(CHUNKS)
+
+    short = summarize_lecture(store, "short")
+    assert store.cached_summary(800) == short
+    assert summarize_lecture(store, "short") is short
+    # unknown detail levels fall back to the medium budget
+    assert summarize_lecture(store, "unknown") is summarize_lecture(store, "medium")
+
+
+# ----------------- On-disk store cache ----------------- #
+
+def _cacheable_store():
+    store = TfidfStore(CHUNKS)
+    store.raw_text = " ".join(CHUNKS)
+    store.keywords = ["memory", "deadlock"]
+    return store
+
+
+def test_cached_store_round_trip(tmp_path, monkeypatch):
+    monkeypatch.setattr(rag_utils, "CACHE_DIR", str(tmp_path))
+    store = _cacheable_store()
+    save_cached_store("pdf1", store)
+
+    loaded = load_cached_store("pdf1")
+    assert loaded.pdf_hash == "pdf1"
+    assert loaded.chunks == store.chunks
+    assert loaded.raw_text == store.raw_text
+    assert loaded.keywords == store.keywords
+    assert loaded.chunk_plan_lines == store.chunk_plan_lines
+    assert (loaded.matrix != store.matrix).nnz == 0
+    q = "page table mapping"
+    assert answer_question(q, loaded) == answer_question(q, store)
+
+    assert load_cached_store("unknown") is None
+
+
+def test_cached_store_version_mismatch_is_a_miss(tmp_path, monkeypatch):
+    monkeypatch.setattr(rag_utils, "CACHE_DIR", str(tmp_path))
+    save_cached_store("pdf1", _cacheable_store())
+    monkeypatch.setattr(rag_utils, "CACHE_VERSION", rag_utils.CACHE_VERSION + 1)
+    assert load_cached_store("pdf1") is None
+
+
+def test_cached_stores_beyond_max_entries_are_evicted(tmp_path, monkeypatch):
+    monkeypatch.setattr(rag_utils, "CACHE_DIR", str(tmp_path))
+    monkeypatch.setattr(rag_utils, "CACHE_MAX_ENTRIES", 2)
+    store = _cacheable_store()
+    now = rag_utils.time.time()
+    for i, pdf_id in enumerate(["old", "mid", "new"]):
+        save_cached_store(pdf_id, store)
+        os.utime(tmp_path / pdf_id, (now - 30 + i, now - 30 + i))
+    assert sorted(os.listdir(tmp_path)) == ["mid", "new"]
+
+    # loading marks an entry as recently used
+    assert load_cached_store("mid") is not None
+    save_cached_store("newest", store)
+    assert sorted(os.listdir(tmp_path)) == ["mid", "newest"]
+
+
+def test_cached_stores_past_max_age_are_evicted(tmp_path, monkeypatch):
+    monkeypatch.setattr(rag_utils, "CACHE_DIR", str(tmp_path))
+    store = _cacheable_store()
+    save_cached_store("stale", store)
+    expired = rag_utils.time.time() - rag_utils.CACHE_MAX_AGE - 60
+    os.utime(tmp_path / "stale", (expired, expired))
+    assert load_cached_store("stale") is None
+    assert not (tmp_path / "stale").exists()
+
+    save_cached_store("expired", store)
+    os.utime(tmp_path / "expired", (expired, expired))
+    save_cached_store("fresh", store)
+    assert os.listdir(tmp_path) == ["fresh"]